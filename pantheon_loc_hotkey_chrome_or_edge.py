@@ -1,11 +1,21 @@
 import os
 import re
+import sys
+import gzip
 import time
 import json
+import select
 import socket
+import cProfile
+import argparse
+import itertools
+import threading
 import subprocess
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import NamedTuple, Optional, Tuple
 
 import requests
 import websocket  # websocket-client
@@ -15,10 +25,21 @@ import pyperclip
 import pygetwindow as gw
 import ctypes
 
+try:
+    import orjson  # optional, faster decoding of CDP replies
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
 # =========================
 # Config
 # =========================
-MAP_URL = "https://shalazam.info/maps/1"
+MAP_URL_TEMPLATE = "https://shalazam.info/maps/{map_id}"
+DEFAULT_MAP_ID = 1
+MAP_URL = MAP_URL_TEMPLATE.format(map_id=DEFAULT_MAP_ID)
+
+# Optional per-map/zone coordinate transforms, next to the script/exe (see load_map_transforms)
+MAP_TRANSFORMS_FILE = "pantheon_maps.json"
 
 # Choose any free port; we reuse one port for the chosen browser
 DEBUG_PORT = 9222
@@ -30,6 +51,19 @@ CHROME_PROFILE_DIR = r"C:\chromeprofile_panth"
 # Allow all origins for simplicity/compat
 ALLOW_ORIGINS = "*"
 
+# Performance launch profile (--perf-profile): keep the map tab running at full
+# speed while it sits behind the game, and skip extension startup.
+PERF_PROFILE = False
+APP_WINDOW   = False  # --app-window: open the map as a chromeless app window
+PERF_LAUNCH_FLAGS = [
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-features=CalculateNativeWinOcclusion,IntensiveWakeUpThrottling",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+]
+
 PANTHEON_WINDOW_TITLES = ["Pantheon", "Pantheon: Rise of the Fallen"]
 
 # Timings
@@ -37,12 +71,41 @@ TYPING_DELAY    = 0.05
 CHAT_WAKE_DELAY = 0.30
 AFTER_LOC_WAIT  = 1.10
 DEVTOOLS_TIMEOUT = 45.0
+DEVTOOLS_POLL    = 0.10
+PAGE_READY_TIMEOUT = 20.0  # waiting for the map's X/Y inputs after load/navigation
+EVENT_BUFFER_MAX = 256     # subscribed CDP events held until dispatch (oldest dropped)
+
+# Pin placement
+DROP_DEADLINE   = 5.0   # s from starting a drop to a confirmed pin, across all retries
+CONFIRM_TIMEOUT = 1.5   # s the page gets to show a new marker before a pin counts as unconfirmed
+RETRY_BACKOFF   = 0.10  # s first wait after inputs-not-found; doubles up to 1 s
+REPLY_MARGIN    = 0.5   # s on top of CONFIRM_TIMEOUT before one drop attempt's reply counts as late
 
 # Hotkeys
 HOTKEY_TRIGGER  = "ctrl+l"
 HOTKEY_QUIT     = "ctrl+q"
 HOTKEY_DEBOUNCE = 0.35
 
+# Multi-client (--multi): one worker per game window, each with its own map tab
+HOTKEY_CLIENT_FMT  = "ctrl+alt+{n}"  # capture client n only (1-9)
+HOTKEY_ALL_CLIENTS = "ctrl+shift+l"  # capture every client, drops run in parallel
+
+# Dedup cache: skip pins already on the page, coordinates quantized to this grid
+PIN_CACHE_GRID = 1.0  # game units; --dedup-grid 0 disables the cache
+PIN_CACHE_SIZE = 256  # pins remembered across all tabs (LRU)
+
+# Passive mode (--watch): react to clipboard changes instead of typing /loc
+CLIPBOARD_POLL_INTERVAL = 0.25  # fallback poller when no change listener is available
+
+# Trace capture (--record / --replay)
+TRACE_VERSION = 1
+TRACE_FLUSH_EVERY = 256   # records between gzip flushes
+
+# Timeline tracing (--timeline PATH): Chrome trace-event JSON, open in ui.perfetto.dev
+TIMELINE_BUFFER = 8192          # spans held in memory between flushes (oldest dropped)
+TIMELINE_FLUSH_INTERVAL = 1.0   # seconds
+HOTKEY_PROFILE = "ctrl+shift+p" # toggle a cProfile capture of the trigger worker
+
 
 # =========================
 # Small utils
@@ -65,7 +128,7 @@ def wait_for_devtools(timeout: float) -> bool:
                 return True
             except Exception:
                 pass
-        time.sleep(0.3)
+        time.sleep(DEVTOOLS_POLL)
     return False
 
 def ask_yn(msg: str) -> bool:
@@ -74,6 +137,371 @@ def ask_yn(msg: str) -> bool:
     except EOFError:
         return False
 
+def launch_profile_name() -> str:
+    return "perf" if PERF_PROFILE else "default"
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+# =========================
+# Trace record / replay
+# =========================
+# A trace is gzip'd text, one compact JSON array per line: [dt_us, kind, data]
+# or [dt_us, kind, data, client], where dt_us is relative to the previous record
+# and `client` tags records of one game client in --multi. The first line is a header.
+# Kinds: "tx"/"rx" raw CDP frames, "clip" clipboard reads, "key" hotkey events,
+# "hit" triggers skipped as already pinned (PIN_CACHE), and
+# "mark" named timings ({"name": ..., "ms": ...}) such as time-to-ready.
+TRACE = None  # active TraceRecorder, if any
+
+class TraceRecorder:
+    def __init__(self, path: str):
+        self.f = gzip.open(path, "wt", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.last = time.perf_counter_ns()
+        self.pending = 0
+        self._write({"v": TRACE_VERSION, "t0": time.time()})
+
+    def _write(self, obj):
+        self.f.write(json.dumps(obj, separators=(",", ":"), ensure_ascii=False))
+        self.f.write("\n")
+
+    def record(self, kind: str, data, tag=None):
+        with self.lock:
+            if self.f.closed:
+                return  # a worker still finishing after shutdown
+            now = time.perf_counter_ns()
+            rec = [(now - self.last) // 1000, kind, data]
+            if tag is not None:
+                rec.append(tag)
+            self._write(rec)
+            self.last = now
+            self.pending += 1
+            if self.pending >= TRACE_FLUSH_EVERY:
+                self.f.flush()
+                self.pending = 0
+
+    def close(self):
+        with self.lock:
+            try:
+                self.f.close()
+            except Exception:
+                pass
+
+def trace(kind: str, data, tag=None):
+    if TRACE is not None:
+        TRACE.record(kind, data, tag)
+
+def read_trace(path: str):
+    """Yield (dt_us, kind, data, tag) records one at a time; tolerates a truncated tail."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("v") != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version: {header.get('v')!r}")
+        try:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    yield rec[0], rec[1], rec[2], (rec[3] if len(rec) > 3 else None)
+        except (EOFError, json.JSONDecodeError):
+            return
+
+class ReplaySocket:
+    """Stand-in for the CDP websocket: each request is answered with the frames recorded after it.
+
+    A request with no recorded frames times out, as it did live; a request the
+    live run didn't make at this point raises ConnectionError (the run diverged,
+    or the live socket was lost here).
+    """
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self.requests = deque()  # (recorded tx, [(dt_us, raw), ...]) in send order
+        self.rx = deque()        # (dt_us, raw) due for the request in flight
+
+    def load(self, requests):
+        self.requests.clear()
+        self.requests.extend(requests)
+        self.rx.clear()
+
+    def skip_to(self, match):
+        """Drop recorded requests up to the next one whose raw tx satisfies `match`."""
+        while self.requests and not match(self.requests[0][0]):
+            self.requests.popleft()
+        return bool(self.requests)
+
+    def send(self, raw: str):
+        if not self.requests:
+            raise ConnectionError("replay: no recorded request left")
+        sent, rec = json.loads(raw), json.loads(self.requests[0][0])
+        if sent.get("method") != rec.get("method"):
+            raise ConnectionError(f"replay: sent {sent.get('method')}, recorded {rec.get('method')}")
+        _, frames = self.requests.popleft()
+        # Replies carry the recorded id; renumber them if replay's ids drifted
+        old, new = '{"id":%d,' % rec["id"], '{"id":%d,' % sent["id"]
+        self.rx.extend((dt, new + r[len(old):] if r.startswith(old) else r) for dt, r in frames)
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self) -> str:
+        if not self.rx:
+            raise websocket.WebSocketTimeoutException("replay: no reply was recorded for this request")
+        dt, raw = self.rx.popleft()
+        if self.speed > 0 and dt > 0:
+            time.sleep(dt / 1e6 / self.speed)
+        return raw
+
+    def close(self):
+        pass
+
+def _is_drop_eval(tx: str) -> bool:
+    return "__panthPin.drop(" in tx
+
+def replay_trace(path: str, speed: float = 1.0) -> Tuple[list, dict]:
+    """Feed each recorded trigger through parse + GameClient.drop against its recorded frames.
+
+    The stand-in page starts on the map and with the helper registration the
+    trace implies, so map switches and retries replay as they ran live.
+    Triggers recorded as PIN_CACHE hits are counted, not replayed.
+    Returns ([(latency_ms, ok)], {mark name: [recorded ms]}).
+    """
+    results = []
+    marks = {}
+    segments = {}           # client tag -> records following its current "key" event
+    cached = 0              # triggers answered from PIN_CACHE when recorded
+    t_trace = 0             # trace clock (us since header)
+    wall0 = time.perf_counter()
+
+    def run(tag, seg):
+        nonlocal cached
+        clip = next((d for k, d, _ in seg if k == "clip"), None)
+        tx = [d for k, d, _ in seg if k == "tx"]
+        if clip is None:
+            return
+        if any(k == "hit" for k, _, _ in seg):
+            cached += 1  # live run skipped the drop; there is nothing to play back
+            return
+        if speed > 0:
+            due = wall0 + next(t for k, _, t in seg if k == "clip") / 1e6 / speed
+            time.sleep(max(0.0, due - time.perf_counter()))
+        # Group rx frames under the request they followed; delays are relative to
+        # this client's previous record, not whatever another client did
+        requests, prev = [], seg[0][2]
+        for k, d, t in seg:
+            if k == "tx":
+                requests.append((d, []))
+            elif k == "rx" and requests:
+                requests[-1][1].append((t - prev, d))
+            prev = t
+        t0 = time.perf_counter()
+        plan = plan_drop(clip)
+        if not plan:
+            results.append(((time.perf_counter() - t0) * 1000.0, False))
+            return
+        sock = ReplaySocket(speed)
+        sock.load(requests)
+        cdp = CDPClient(ws=sock)
+        cdp.tag = tag
+        if requests:
+            cdp.msg_id = json.loads(requests[0][0])["id"] - 1
+        # What the live client did before its first drop tells us the state it was in
+        setup = [json.loads(d).get("method") for d in itertools.takewhile(lambda d: not _is_drop_eval(d), tx)]
+        cdp.map_id = None if "Page.navigate" in setup else plan.map_id
+        cdp.helper_script_id = None if "Page.addScriptToEvaluateOnNewDocument" in setup else "replay"
+        client = GameClient(tag or 1, cdp=cdp, tag=tag)
+
+        def reattach(browser):
+            # The live socket was lost here; resume at the drop it made after reattaching
+            if not sock.skip_to(_is_drop_eval):
+                raise ConnectionError("replay: no recorded drop after the connection was lost")
+            cdp.map_id = plan.map_id
+            return cdp
+
+        client.reconnect = reattach
+        ok = False
+        try:
+            ok = client.drop(plan, "replay").ok
+        except ConnectionError as e:
+            print(f"[!] Replay diverged from the trace: {e}")
+        results.append(((time.perf_counter() - t0) * 1000.0, ok))
+
+    for dt, kind, data, tag in read_trace(path):
+        t_trace += dt
+        if kind == "mark":
+            marks.setdefault(data["name"], []).append(data["ms"])
+        elif kind == "key":
+            if segments.get(tag):
+                run(tag, segments[tag])
+            segments[tag] = []
+        elif tag in segments:
+            segments[tag].append((kind, data, t_trace))
+    for tag, seg in segments.items():
+        if seg:
+            run(tag, seg)
+    if cached:
+        print(f"[replay] {cached} trigger(s) were already pinned when recorded; not replayed.")
+    return results, marks
+
+def bench_receive(path: str, rounds: int = 5):
+    """Micro-benchmark CDPClient's receive path on the rx frames of a recorded trace."""
+    frames = [d for _, kind, d, _ in read_trace(path) if kind == "rx"]
+    if not frames:
+        print("[!] Trace contains no received CDP frames.")
+        return
+    cdp = CDPClient(ws=ReplaySocket(0))
+    PinCache(grid=1.0).watch(cdp)  # subscriptions as in a live session
+    cdp.msg_id = 1 << 30           # nothing matches: every frame takes the "not ours" path
+
+    def full_decode():
+        for raw in frames:
+            json.loads(raw).get("id")
+
+    def lean():
+        for raw in frames:
+            cdp._route(raw)
+        cdp.events.clear()
+
+    def best_of(fn) -> float:
+        best = float("inf")
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        return best / len(frames) * 1e6
+
+    old_us, new_us = best_of(full_decode), best_of(lean)
+    backend = "orjson" if json_loads is not json.loads else "json"
+    print(f"[bench] {len(frames)} frames, {sum(map(len, frames)) / 1024:.0f} KiB, JSON backend: {backend}")
+    print(f"[bench] full decode: {old_us:.2f} us/frame   lean route: {new_us:.2f} us/frame   "
+          f"({old_us / new_us if new_us else float('inf'):.1f}x)")
+
+def report_replay(results: list, marks: dict):
+    for name, values in marks.items():
+        print(f"[replay] recorded {name}: n={len(values)} p50={percentile(values, 50):.1f}ms "
+              f"p95={percentile(values, 95):.1f}ms max={max(values):.1f}ms")
+    if not results:
+        print("[!] Trace contains no hotkey triggers.")
+        return
+    lat = [ms for ms, _ in results]
+    ok = sum(1 for _, good in results if good)
+    print(f"[replay] triggers={len(results)} ok={ok} "
+          f"p50={percentile(lat, 50):.2f}ms p95={percentile(lat, 95):.2f}ms max={max(lat):.2f}ms")
+
+
+# =========================
+# Timeline tracing + profiling
+# =========================
+TIMELINE = None  # active Timeline, if any
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ("buf", "name", "args", "t0")
+
+    def __init__(self, buf: deque, name: str, args: dict):
+        self.buf = buf
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t1 = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        # deque.append is atomic, so the hot path takes no lock
+        self.buf.append((self.name, self.t0, t1 - self.t0, threading.get_ident(), self.args))
+        return False
+
+def span(name: str, **args):
+    """Time a step as a complete trace event; a shared no-op when tracing is off."""
+    tl = TIMELINE
+    return Span(tl.buf, name, args) if tl is not None else NULL_SPAN
+
+class Timeline:
+    """Ring buffer of spans, appended to a Chrome trace-event JSON array by a background thread."""
+    def __init__(self, path: str):
+        self.buf = deque(maxlen=TIMELINE_BUFFER)
+        self.pid = os.getpid()
+        self.f = open(path, "w", encoding="utf-8")
+        self.f.write("[\n")
+        self.sep = ""
+        self.named = set()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="timeline-flush", daemon=True)
+        self.thread.start()
+
+    def _emit(self, event: dict):
+        self.f.write(self.sep + json.dumps(event, separators=(",", ":")))
+        self.sep = ",\n"
+
+    def flush(self):
+        names = None
+        while self.buf:
+            name, t0, dur, tid, args = self.buf.popleft()
+            if tid not in self.named:
+                if names is None:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.named.add(tid)
+                self._emit({"ph": "M", "name": "thread_name", "pid": self.pid, "tid": tid,
+                            "args": {"name": names.get(tid, str(tid))}})
+            self._emit({"ph": "X", "name": name, "pid": self.pid, "tid": tid,
+                        "ts": t0 / 1000.0, "dur": dur / 1000.0, "args": args})
+        self.f.flush()
+
+    def _run(self):
+        while not self.stop_event.wait(TIMELINE_FLUSH_INTERVAL):
+            self.flush()
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join(timeout=2.0)
+        self.flush()
+        self.f.write("\n]\n")
+        self.f.close()
+
+class TriggerProfiler:
+    """On-demand cProfile capture of the trigger worker; each capture is dumped to its own .prof."""
+    def __init__(self):
+        self.lock = threading.Lock()      # guards self.prof only; never held while a trigger runs
+        self.run_lock = threading.Lock()  # a Profile can't be active in two threads at once
+        self.prof = None
+
+    def toggle(self):
+        with self.lock:
+            if self.prof is None:
+                self.prof = cProfile.Profile()
+                print(f"\n[profile] Capturing triggers… press {HOTKEY_PROFILE} again to save.")
+                return
+            prof, self.prof = self.prof, None
+        path = f"pantheon_trigger_{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        with self.run_lock:  # let a profiled trigger still in flight finish first
+            prof.dump_stats(path)
+        print(f"\n[profile] Wrote {path} (view with: py -m pstats {path})")
+
+    def run(self, fn, *args):
+        with self.lock:
+            prof = self.prof
+        if prof is None:
+            return fn(*args)
+        with self.run_lock:
+            return prof.runcall(fn, *args)
+
 
 # =========================
 # Browser control (Edge/Chrome)
@@ -105,7 +533,7 @@ def kill_chrome():
         subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
 def launch_browser_with_devtools(browser: str, url: str):
-    """browser in {'edge','chrome'}"""
+    """browser in {'edge','chrome'}; honours PERF_PROFILE / APP_WINDOW"""
     if browser == "edge":
         exe = find_edge_exe()
         prof = EDGE_PROFILE_DIR
@@ -121,8 +549,10 @@ def launch_browser_with_devtools(browser: str, url: str):
         f"--user-data-dir={prof}",
         "--no-first-run",
         "--no-default-browser-check",
-        url,
     ]
+    if PERF_PROFILE:
+        args += PERF_LAUNCH_FLAGS
+    args.append(f"--app={url}" if APP_WINDOW else url)
     subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
 def ensure_browser_ready(browser: str):
@@ -152,7 +582,7 @@ def list_targets() -> list:
 def find_shalazam_target() -> Optional[dict]:
     try:
         for t in list_targets():
-            if t.get("type") == "page" and "shalazam.info/maps/1" in (t.get("url") or ""):
+            if t.get("type") == "page" and "shalazam.info/maps/" in (t.get("url") or ""):
                 return t
         for t in list_targets():
             if t.get("type") == "page":
@@ -162,39 +592,148 @@ def find_shalazam_target() -> Optional[dict]:
     return None
 
 class CDPClient:
-    def __init__(self, ws_url: str):
+    def __init__(self, ws_url: str = "", ws=None):
         # Send exactly one Origin header via origin= to satisfy modern Chromium
-        self.ws = websocket.create_connection(
+        self.ws = ws or websocket.create_connection(
             ws_url,
             enable_multithread=True,
             origin=f"http://127.0.0.1:{DEBUG_PORT}",
         )
         self.msg_id = 0  # initialize request counter
+        self.map_id = None  # Shalazam map currently shown in the tab
+        self.target_id = None  # DevTools target id of the tab, when known
+        self.helper_script_id = None  # Page.addScriptToEvaluateOnNewDocument registration
+        self.tag = None  # client number on trace records (--multi)
+        self.handlers = {}  # event method -> [callback(params)]
+        self.enabled = set()  # CDP domains already enabled on this connection
+        self.events = deque(maxlen=EVENT_BUFFER_MAX)  # (method, raw) awaiting dispatch
+        self.events_dropped = 0  # events lost to a full buffer
+        self.overflow_handlers = []  # [callback()] run when events were lost since the last dispatch
+        self._dropped_seen = 0
+        self._reply_prefix = None
 
-    def send(self, method: str, params: dict | None = None):
+    def on(self, method: str, callback):
+        """Subscribe to a CDP event; enable() turns on only the domains subscribed to."""
+        self.handlers.setdefault(method, []).append(callback)
+
+    def on_overflow(self, callback):
+        """Run `callback()` before dispatch whenever buffered events had to be dropped."""
+        self.overflow_handlers.append(callback)
+
+    def _route(self, raw: str) -> Optional[dict]:
+        """Return the decoded reply if `raw` answers the pending command.
+
+        Chromium puts "id" or "method" first, so replies and events are told apart
+        by prefix: subscribed events are queued undecoded, everything else is
+        dropped without parsing. Other layouts fall back to a full decode.
+        """
+        if self._reply_prefix and raw.startswith(self._reply_prefix):
+            return json_loads(raw)
+        if raw.startswith('{"method":"'):
+            method = raw[11:raw.find('"', 11)]
+            if method in self.handlers:
+                self._queue_event(method, raw)
+            return None
+        if raw.startswith('{"id":') and raw[6:7].isdigit():
+            return None  # late reply to a command we already gave up on
+        msg = json_loads(raw)
+        if msg.get("id") == self.msg_id:
+            return msg
+        if msg.get("method") in self.handlers:
+            self._queue_event(msg["method"], raw)
+        return None
+
+    def _queue_event(self, method: str, raw: str):
+        if len(self.events) == self.events.maxlen:
+            self.events_dropped += 1
+        self.events.append((method, raw))
+
+    def _drain_events(self):
+        if self.events_dropped != self._dropped_seen:
+            self._dropped_seen = self.events_dropped
+            for cb in self.overflow_handlers:
+                cb()
+        while self.events:
+            method, raw = self.events.popleft()
+            params = json_loads(raw).get("params") or {}
+            for cb in self.handlers.get(method, ()):
+                cb(params)
+
+    def send(self, method: str, params: dict | None = None, timeout: Optional[float] = None):
+        """Send a command and wait for its reply; raises WebSocketTimeoutException after `timeout` s."""
+        if timeout is not None and timeout <= 0:
+            # Nothing is sent: a command we can't wait for may still act (e.g. click the drop button)
+            raise websocket.WebSocketTimeoutException(f"{method}: no time left to send")
         self.msg_id += 1
         payload = {"id": self.msg_id, "method": method}
         if params:
             payload["params"] = params
-        self.ws.send(json.dumps(payload))
-        while True:
-            resp = json.loads(self.ws.recv())
-            if resp.get("id") == self.msg_id:
-                return resp
+        msg = json.dumps(payload)
+        if TRACE is not None:
+            TRACE.record("tx", msg, self.tag)
+        end = None if timeout is None else time.perf_counter() + timeout
+        self._reply_prefix = '{"id":%d,' % self.msg_id
+        with span(method, id=self.msg_id):
+            self.ws.send(msg)
+            try:
+                while True:
+                    if end is not None:
+                        left = end - time.perf_counter()
+                        if left <= 0:
+                            raise websocket.WebSocketTimeoutException(f"{method}: no reply in {timeout:.1f}s")
+                        self.ws.settimeout(left)
+                    raw = self.ws.recv()
+                    if TRACE is not None:
+                        TRACE.record("rx", raw, self.tag)
+                    resp = self._route(raw)
+                    if resp is not None:
+                        break
+            finally:
+                if end is not None:
+                    self.ws.settimeout(None)
+        if self.events:
+            self._drain_events()
+        return resp
+
+    def poll_events(self):
+        """Handle events already waiting on the socket, without blocking."""
+        sock = getattr(self.ws, "sock", None)
+        if sock is not None:
+            while select.select([sock], [], [], 0)[0]:
+                raw = self.ws.recv()
+                if TRACE is not None:
+                    TRACE.record("rx", raw, self.tag)
+                self._route(raw)
+        if self.events:
+            self._drain_events()
 
-    def eval(self, expression: str):
+    def eval(self, expression: str, timeout: Optional[float] = None):
         return self.send("Runtime.evaluate", {
             "expression": expression,
             "awaitPromise": True,
             "returnByValue": True
-        })
+        }, timeout=timeout)
+
+    def navigate(self, url: str, timeout: Optional[float] = None):
+        self.map_id = map_id_from_url(url)
+        return self.send("Page.navigate", {"url": url}, timeout=timeout)
 
-    def navigate(self, url: str):
-        return self.send("Page.navigate", {"url": url})
+    def enable(self, timeout: Optional[float] = None):
+        # Runtime.evaluate / Page.navigate work without enabling their domains; only
+        # subscribed events need one, and every enabled domain floods us with events.
+        domains = {m.split(".", 1)[0] for m in self.handlers}
+        if self.helper_script_id is not None:
+            # Chromium injects addScriptToEvaluateOnNewDocument scripts only while Page is enabled
+            domains.add("Page")
+        for domain in sorted(domains - self.enabled):
+            self.send(f"{domain}.enable", {}, timeout=timeout)
+            self.enabled.add(domain)
 
-    def enable(self):
-        self.send("Runtime.enable", {})
-        self.send("Page.enable", {})
+    def keep_active(self):
+        """Ask the page to stay in the active lifecycle state even when hidden behind the game."""
+        self.send("Page.setWebLifecycleState", {"state": "active"})
+        self.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        self.send("Emulation.setIdleOverride", {"isUserActive": True, "isScreenUnlocked": True})
 
     def close(self):
         try:
@@ -202,16 +741,54 @@ class CDPClient:
         except Exception:
             pass
 
+def open_map_tab() -> dict:
+    """Open a new Shalazam tab and return its DevTools target."""
+    url = f"http://127.0.0.1:{DEBUG_PORT}/json/new?{MAP_URL}"
+    r = requests.put(url, timeout=5.0)
+    if r.status_code == 405:  # older browsers only accept GET here
+        r = requests.get(url, timeout=5.0)
+    return r.json()
+
+def attach_target(t: dict) -> CDPClient:
+    cdp = CDPClient(t["webSocketDebuggerUrl"])
+    cdp.target_id = t.get("id")
+    PIN_CACHE.watch(cdp)
+    cdp.enable()
+    if PERF_PROFILE:
+        # The browser may predate our flags (attached, not launched), so also ask via CDP
+        cdp.keep_active()
+    cdp.map_id = map_id_from_url(t.get("url") or "")
+    if cdp.map_id is None:
+        cdp.navigate(MAP_URL)  # prewarm_pin_path waits for the page to come up
+    return cdp
+
+def attach_existing() -> Tuple[Optional[CDPClient], bool]:
+    """Attach to and pre-warm a map tab if a DevTools browser is already up -> (cdp, warmed).
+
+    Needs no answer to the browser prompt (an open port is attached to either way),
+    so main() runs it while the prompt is still on screen.
+    """
+    if not is_port_open("127.0.0.1", DEBUG_PORT):
+        return None, False
+    try:
+        t = find_shalazam_target()
+        if not t:
+            return None, False
+        cdp = attach_target(t)
+    except Exception:
+        return None, False  # e.g. 403: let the interactive path explain and relaunch
+    try:
+        return cdp, prewarm_pin_path(cdp)
+    except (websocket.WebSocketException, ConnectionError, OSError):
+        cdp.close()
+        return None, False  # socket died while warming; the interactive path reattaches
+
 def connect_to_shalazam_cdp(allow_relaunch=True, browser="edge") -> Optional[CDPClient]:
     # Try to attach to whichever page we find
     try:
         t = find_shalazam_target()
         if t:
-            cdp = CDPClient(t["webSocketDebuggerUrl"])
-            cdp.enable()
-            if "shalazam.info/maps/1" not in (t.get("url") or ""):
-                cdp.navigate(MAP_URL); time.sleep(1.2)
-            return cdp
+            return attach_target(t)
     except websocket._exceptions.WebSocketBadStatusException as e:
         # 403 means browser wasn’t launched with --remote-allow-origins
         if "403" in str(e) and allow_relaunch:
@@ -253,17 +830,39 @@ def connect_to_shalazam_cdp(allow_relaunch=True, browser="edge") -> Optional[CDP
 # =========================
 # Pantheon helpers (robust Win32 focus)
 # =========================
-def focus_pantheon() -> bool:
-    target = None
+def find_pantheon_window():
+    titles = gw.getAllTitles()
     for needle in PANTHEON_WINDOW_TITLES:
-        for t in gw.getAllTitles():
+        for t in titles:
             if needle.lower() in t.lower():
                 matches = gw.getWindowsWithTitle(t)
                 if matches:
-                    target = matches[0]
-                    break
-        if target:
-            break
+                    return matches[0]
+    return None
+
+def find_pantheon_windows() -> list:
+    """Every Pantheon window, one entry per handle, in discovery order."""
+    titles = gw.getAllTitles()
+    found, seen = [], set()
+    for needle in PANTHEON_WINDOW_TITLES:
+        for t in titles:
+            if needle.lower() in t.lower():
+                for w in gw.getWindowsWithTitle(t):
+                    if w._hWnd not in seen:
+                        seen.add(w._hWnd)
+                        found.append(w)
+    return found
+
+def window_alive(target) -> bool:
+    try:
+        return bool(ctypes.windll.user32.IsWindow(int(target._hWnd)))
+    except Exception:
+        return False
+
+def focus_pantheon(target=None) -> bool:
+    """Focus `target` if it is still a live window, otherwise the first Pantheon window found."""
+    if target is None or not window_alive(target):
+        target = find_pantheon_window()
     if not target:
         return False
 
@@ -334,134 +933,865 @@ def focus_pantheon() -> bool:
             return False
 
 def send_loc_and_copy():
-    pyautogui.press("enter")
+    with span("key enter"):
+        pyautogui.press("enter")
     time.sleep(CHAT_WAKE_DELAY)
-    pyautogui.typewrite("/loc", interval=TYPING_DELAY)
-    pyautogui.press("enter")
-    time.sleep(AFTER_LOC_WAIT)
+    with span("key /loc"):
+        pyautogui.typewrite("/loc", interval=TYPING_DELAY)
+    with span("key enter"):
+        pyautogui.press("enter")
+    with span("clipboard wait"):
+        time.sleep(AFTER_LOC_WAIT)
 
-def get_clipboard_text() -> str:
+def read_clipboard() -> str:
+    """Clipboard text without tracing; callers decide whether it is ours to record."""
     try:
         return pyperclip.paste()
     except Exception:
         return ""
 
-def parse_jumploc(raw: str) -> Tuple[Optional[str], Optional[str]]:
-    m = re.match(
-        r"^\s*\/?jumploc\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)",
-        (raw or "").strip(), flags=re.IGNORECASE
-    )
+def get_clipboard_text(tag=None) -> str:
+    """Clipboard text right after our own /loc; always recorded when tracing."""
+    text = read_clipboard()
+    trace("clip", text, tag)
+    return text
+
+JUMPLOC_RE = re.compile(
+    r"^\s*\/?jumploc\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)\s+(-?\d+(\.\d+)?)",
+    flags=re.IGNORECASE,
+)
+
+class Location(NamedTuple):
+    x: float
+    z: float
+    y: float
+    heading: float
+
+def parse_location(raw: str) -> Optional[Location]:
+    """Full `/jumploc X Z Y H` parse, keeping height and heading."""
+    m = JUMPLOC_RE.match((raw or "").strip())
     if not m:
-        return None, None
-    return m.group(1), m.group(5)  # X (1st), Y (3rd)
+        return None
+    return Location(float(m.group(1)), float(m.group(3)), float(m.group(5)), float(m.group(7)))
+
+
+# =========================
+# Map coordinate transforms
+# =========================
+# pantheon_maps.json (optional):
+#   {"maps": [{"map_id": 1, "zone": "Thronefast",
+#              "bounds": [xmin, ymin, xmax, ymax],      # game X/Y covered by this map
+#              "affine": [a, b, c, d, e, f],            # map = (a*x + b*y + c, d*x + e*y + f)
+#              "pixel":  [sx, ox, sy, oy]}]}            # pixel = (sx*mx + ox, sy*my + oy)
+# Entries are tried in order; the first whose bounds contain the location wins.
+IDENTITY_AFFINE = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+UNBOUNDED = (float("-inf"), float("-inf"), float("inf"), float("inf"))
+
+class MapTransform(NamedTuple):
+    map_id: int
+    zone: str
+    bounds: tuple   # (xmin, ymin, xmax, ymax) in game coordinates
+    to_map: tuple   # affine (a, b, c, d, e, f): game -> map
+    to_pixel: tuple # affine (a, b, c, d, e, f): game -> pixel, pre-composed
+
+    def contains(self, x: float, y: float) -> bool:
+        xmin, ymin, xmax, ymax = self.bounds
+        return xmin <= x <= xmax and ymin <= y <= ymax
+
+def make_transform(map_id: int, zone: str = "", bounds=UNBOUNDED,
+                   affine=IDENTITY_AFFINE, pixel=(1.0, 0.0, 1.0, 0.0)) -> MapTransform:
+    a, b, c, d, e, f = (float(v) for v in affine)
+    sx, ox, sy, oy = (float(v) for v in pixel)
+    return MapTransform(
+        int(map_id), zone, tuple(float(v) for v in bounds), (a, b, c, d, e, f),
+        (sx * a, sx * b, sx * c + ox, sy * d, sy * e, sy * f + oy),
+    )
+
+def app_dir() -> Path:
+    return Path(sys.executable if getattr(sys, "frozen", False) else __file__).resolve().parent
+
+@lru_cache(maxsize=None)
+def load_map_transforms(path: Optional[str] = None) -> Tuple[MapTransform, ...]:
+    """Load and cache transforms; always ends with an identity fallback for the default map."""
+    cfg = Path(path) if path else app_dir() / MAP_TRANSFORMS_FILE
+    transforms = []
+    if cfg.exists():
+        try:
+            for m in json.loads(cfg.read_text(encoding="utf-8")).get("maps", []):
+                transforms.append(make_transform(
+                    m["map_id"], m.get("zone", ""), m.get("bounds", UNBOUNDED),
+                    m.get("affine", IDENTITY_AFFINE), m.get("pixel", (1.0, 0.0, 1.0, 0.0)),
+                ))
+        except Exception as e:
+            print(f"[warn] Ignoring {cfg.name}: {e}")
+            transforms = []
+    transforms.append(make_transform(DEFAULT_MAP_ID))
+    return tuple(transforms)
+
+def pick_transform(x: float, y: float, transforms: Optional[Tuple[MapTransform, ...]] = None) -> MapTransform:
+    transforms = transforms or load_map_transforms()
+    for t in transforms:
+        if t.contains(x, y):
+            return t
+    return transforms[-1]
+
+def convert_locations(locs, space: str = "map", transforms=None) -> list:
+    """Convert many Locations in one call -> [(map_id, u, v)] in map or pixel space."""
+    transforms = transforms or load_map_transforms()
+    use_pixel = space == "pixel"
+    out = []
+    append = out.append
+    for loc in locs:
+        x, y = loc.x, loc.y
+        t = pick_transform(x, y, transforms)
+        a, b, c, d, e, f = t.to_pixel if use_pixel else t.to_map
+        append((t.map_id, a * x + b * y + c, d * x + e * y + f))
+    return out
+
+def map_id_from_url(url: str) -> Optional[int]:
+    m = re.search(r"shalazam\.info/maps/(\d+)", url or "")
+    return int(m.group(1)) if m else None
+
+def fmt_coord(v: float) -> str:
+    s = f"{v:.2f}".rstrip("0").rstrip(".")
+    return "0" if s == "-0" else s
+
+class DropPlan(NamedTuple):
+    loc: Location
+    map_id: int
+    x: str
+    y: str
+
+def plan_drop(raw: str) -> Optional[DropPlan]:
+    """Parse clipboard text and resolve which map the pin goes on, in map coordinates."""
+    with span("parse_jumploc"):
+        loc = parse_location(raw)
+        if loc is None:
+            return None
+        map_id, mx, my = convert_locations((loc,))[0]
+        return DropPlan(loc, map_id, fmt_coord(mx), fmt_coord(my))
+
+def ensure_map(cdp: "CDPClient", map_id: int, timeout: float = PAGE_READY_TIMEOUT):
+    """Navigate to `map_id` if needed, all within `timeout` s; transport errors propagate."""
+    if cdp.map_id != map_id:
+        print(f"[info] Switching to Shalazam map {map_id}…")
+        end = time.perf_counter() + timeout
+        cdp.navigate(MAP_URL_TEMPLATE.format(map_id=map_id), timeout=timeout)
+        prewarm_pin_path(cdp, end - time.perf_counter())
 
 
 # =========================
 # JS to drop the pin on Shalazam
 # =========================
-JS_DROP_PIN = r"""
+# Installed once per document (and re-installed on navigation via
+# Page.addScriptToEvaluateOnNewDocument). Caches the X/Y inputs and the drop
+# button, re-resolving only if they were detached from the DOM.
+JS_PIN_HELPER = r"""
 (() => {
+  if (window.__panthPin && window.__panthPin.v === 3) return window.__panthPin.resolve();
   const qs = s => document.querySelector(s);
-  let xInput = qs("input[placeholder='X']") || qs("input[name='x']") || qs("#x");
-  let yInput = qs("input[placeholder='Y']") || qs("input[name='y']") || qs("#y");
-  if (!xInput || !yInput) return { ok:false, reason:"inputs-not-found" };
+  const live = el => el && el.isConnected;
+  const isDrop = b => (b.innerText || b.value || "").toLowerCase().includes("drop");
+  const setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
   const setVal = (el, v) => {
-    const d = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value');
-    d.set.call(el, v);
+    setter.call(el, v);
     el.dispatchEvent(new Event('input', {bubbles:true}));
     el.dispatchEvent(new Event('change', {bubbles:true}));
   };
-  setVal(xInput, "%(X)s");
-  setVal(yInput, "%(Y)s");
-  let dropBtn = Array.from(document.querySelectorAll("button,input[type='button']"))
-    .find(b => (b.innerText || b.value || "").toLowerCase().includes("drop"));
-  if (!dropBtn) {
-    const cand = (xInput.closest("form,div,section") || document).querySelectorAll("button");
-    dropBtn = Array.from(cand).find(b => (b.innerText || "").toLowerCase().includes("drop"));
-  }
-  if (!dropBtn) return { ok:false, reason:"drop-button-not-found" };
-  dropBtn.click();
-  return { ok:true };
+  const pin = { v: 3, x: null, y: null, btn: null };
+  pin.resolve = () => {
+    if (!live(pin.x)) pin.x = qs("input[placeholder='X']") || qs("input[name='x']") || qs("#x");
+    if (!live(pin.y)) pin.y = qs("input[placeholder='Y']") || qs("input[name='y']") || qs("#y");
+    if (!pin.x || !pin.y) return { ok:false, reason:"inputs-not-found" };
+    if (!live(pin.btn)) {
+      pin.btn = Array.from(document.querySelectorAll("button,input[type='button']")).find(isDrop)
+        || Array.from((pin.x.closest("form,div,section") || document).querySelectorAll("button")).find(isDrop);
+    }
+    if (!pin.btn) return { ok:false, reason:"drop-button-not-found" };
+    return { ok:true };
+  };
+  // Resolves confirmed once a marker or popup element that wasn't there before
+  // the click shows up (a new pin, or the count going up), otherwise unconfirmed
+  // after timeoutMs. Other DOM churn (tooltips, our own inputs) doesn't count.
+  // inpage_ms therefore includes the map's own update, throttled or not.
+  const MARKERS = ".leaflet-marker-icon,.leaflet-popup,.maplibregl-marker,.maplibregl-popup,"
+    + ".mapboxgl-marker,.mapboxgl-popup,.ol-overlay-container,[class*='marker']";
+  const place = (x, y, timeoutMs) => new Promise(resolve => {
+    const t0 = performance.now();
+    const r = pin.resolve();
+    if (!r.ok) return resolve(r);
+    setVal(pin.x, x);
+    setVal(pin.y, y);
+    const before = new Set(document.querySelectorAll(MARKERS));
+    const fresh = () => Array.from(document.querySelectorAll(MARKERS)).some(el => !before.has(el));
+    let timer = null;
+    const finish = confirmed => {
+      obs.disconnect();
+      clearTimeout(timer);
+      resolve({ ok:true, confirmed, inpage_ms: performance.now() - t0 });
+    };
+    const obs = new MutationObserver(muts => {
+      if (muts.some(m => m.addedNodes.length) && fresh()) finish(true);
+    });
+    obs.observe(document.body, { childList:true, subtree:true });
+    pin.btn.click();
+    if (fresh()) return finish(true);
+    timer = setTimeout(() => finish(false), timeoutMs);
+  });
+  // A retry of the same coordinates (e.g. after a reply timeout) joins the
+  // placement already in flight instead of clicking a second time.
+  pin.drop = (x, y, timeoutMs) => {
+    const key = x + "," + y;
+    if (pin.inflight && pin.inflight.key === key) return pin.inflight.p;
+    const p = place(x, y, timeoutMs);
+    pin.inflight = { key, p };
+    p.then(() => { if (pin.inflight && pin.inflight.p === p) pin.inflight = null; });
+    return p;
+  };
+  window.__panthPin = pin;
+  return pin.resolve();
 })();
 """
 
-def cdp_drop_pin(cdp: "CDPClient", x: str, y: str) -> bool:
-    code = JS_DROP_PIN.replace("%(X)s", x).replace("%(Y)s", y)
+JS_DROP_PIN = r"""
+((window.__panthPin && window.__panthPin.v === 3)
+  ? window.__panthPin.drop("%(X)s", "%(Y)s", %(T)s)
+  : { ok:false, reason:"helper-missing" })
+"""
+
+INPAGE_LATENCY = deque(maxlen=1000)   # ms per drop, as measured inside the page
+CONFIRM_LATENCY = deque(maxlen=1000)  # ms from starting a drop to the page confirming it
+
+# Retry strategy per failure kind (see GameClient.drop)
+NOT_FOUND_REASONS = ("inputs-not-found", "drop-button-not-found")
+
+class DropResult(NamedTuple):
+    ok: bool                  # the drop button was clicked
+    confirmed: bool           # ...and a new marker/popup appeared
+    reason: str               # last failure reason, "" on success
+    attempts: int
+    total_ms: float           # time to the final outcome, retries included
+    inpage_ms: Optional[float] = None
+
+def eval_value(res) -> Optional[dict]:
+    val = ((res or {}).get("result") or {}).get("result", {}).get("value")
+    return val if isinstance(val, dict) else None
+
+def prewarm_pin_path(cdp: "CDPClient", timeout: float = PAGE_READY_TIMEOUT) -> bool:
+    """Install the pin helper and wait until the map's inputs and drop button resolve.
+
+    Returns False if they don't within `timeout` s. A lost socket is raised, not
+    retried: polling a dead connection would only burn the caller's budget.
+    """
+    end = time.perf_counter() + timeout
     try:
-        res = cdp.eval(code)
-        val = ((res or {}).get("result") or {}).get("result", {}).get("value")
-        return bool(isinstance(val, dict) and val.get("ok"))
+        if cdp.helper_script_id is None:  # once per connection; registrations would pile up
+            res = cdp.send("Page.addScriptToEvaluateOnNewDocument", {"source": JS_PIN_HELPER},
+                           timeout=max(0.0, end - time.perf_counter()))
+            cdp.helper_script_id = ((res or {}).get("result") or {}).get("identifier")
+            cdp.enable(timeout=max(0.0, end - time.perf_counter()))  # Page, even with --dedup-grid 0
+        while True:
+            val = eval_value(cdp.eval(JS_PIN_HELPER, timeout=max(0.0, end - time.perf_counter())))
+            if val and val.get("ok"):
+                return True
+            if time.perf_counter() >= end:
+                return False
+            time.sleep(0.1)
+    except websocket.WebSocketTimeoutException:
+        return False  # page too busy to answer within the budget
+
+def cdp_drop_pin(cdp: "CDPClient", x: str, y: str, timeout: Optional[float] = None) -> dict:
+    """One placement attempt; returns the page's {ok, confirmed, reason, inpage_ms}.
+
+    Transport problems (reply timeout, closed socket) are raised for the caller's retry policy.
+    """
+    confirm = CONFIRM_TIMEOUT if timeout is None else max(0.0, min(CONFIRM_TIMEOUT, timeout - 0.1))
+    code = JS_DROP_PIN.replace("%(X)s", x).replace("%(Y)s", y).replace("%(T)s", str(int(confirm * 1000)))
+    end = None if timeout is None else time.perf_counter() + timeout
+    left = lambda: None if end is None else max(0.0, end - time.perf_counter())
+    val = eval_value(cdp.eval(code, timeout=left()))
+    if val and val.get("reason") == "helper-missing":
+        cdp.eval(JS_PIN_HELPER, timeout=left())
+        val = eval_value(cdp.eval(code, timeout=left()))
+    if val and val.get("inpage_ms") is not None:
+        ms = float(val["inpage_ms"])
+        INPAGE_LATENCY.append(ms)
+        trace("mark", {"name": f"inpage_ms[{launch_profile_name()}]", "ms": ms})
+    return val or {"ok": False, "reason": "no-result"}
+
+
+# =========================
+# Clipboard watch (passive mode)
+# =========================
+WM_QUIT = 0x0012
+WM_CLIPBOARDUPDATE = 0x031D
+HWND_MESSAGE = -3
+
+class ClipboardWatcher:
+    """Calls on_text(text) from a background thread whenever new clipboard text appears.
+
+    Windows: blocks on WM_CLIPBOARDUPDATE via AddClipboardFormatListener, so idle cost is zero.
+    Fallback: polls GetClipboardSequenceNumber (or the text itself off Windows) every
+    CLIPBOARD_POLL_INTERVAL and only reads the clipboard when it changed.
+    """
+    def __init__(self, on_text):
+        self.on_text = on_text
+        self.stop_event = threading.Event()
+        self.thread_id = None
+        self.backend = None
+        self.last_text = read_clipboard()  # don't fire for whatever is already there
+
+    def start(self):
+        threading.Thread(target=self._run, name="clipboard-watch", daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread_id:
+            ctypes.windll.user32.PostThreadMessageW(self.thread_id, WM_QUIT, 0, 0)
+
+    def _emit(self):
+        # Untraced: whatever the user copies (passwords included) must not end up in a
+        # trace; on_text records the text only once it parsed as a /jumploc.
+        text = read_clipboard()
+        if text and text != self.last_text:
+            self.last_text = text
+            try:
+                self.on_text(text)
+            except Exception as e:
+                print(f"[!] Clipboard handler error: {e}")
+
+    def _run(self):
+        if not (hasattr(ctypes, "windll") and self._run_listener()):
+            self._run_poll()
+
+    def _run_listener(self) -> bool:
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+        ]
+        user32.AddClipboardFormatListener.argtypes = [wintypes.HWND]
+        user32.RemoveClipboardFormatListener.argtypes = [wintypes.HWND]
+        user32.DestroyWindow.argtypes = [wintypes.HWND]
+
+        # Message-only window: never shown, only receives our notifications
+        hwnd = user32.CreateWindowExW(0, "STATIC", None, 0, 0, 0, 0, 0,
+                                      wintypes.HWND(HWND_MESSAGE), None, None, None)
+        if not hwnd:
+            return False
+        if not user32.AddClipboardFormatListener(hwnd):
+            user32.DestroyWindow(hwnd)
+            return False
+        self.backend = "listener"
+        self.thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        msg = wintypes.MSG()
+        try:
+            while not self.stop_event.is_set() and user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_CLIPBOARDUPDATE:
+                    self._emit()
+        finally:
+            user32.RemoveClipboardFormatListener(hwnd)
+            user32.DestroyWindow(hwnd)
+        return True
+
+    def _run_poll(self):
+        try:
+            get_seq = ctypes.windll.user32.GetClipboardSequenceNumber
+            self.backend = "sequence-poll"
+        except AttributeError:
+            get_seq = None
+            self.backend = "text-poll"
+        last_seq = get_seq() if get_seq else None
+        while not self.stop_event.wait(CLIPBOARD_POLL_INTERVAL):
+            if get_seq:
+                seq = get_seq()
+                if seq == last_seq:
+                    continue
+                last_seq = seq
+            self._emit()
+
+
+# =========================
+# Dedup cache (pins already on the map)
+# =========================
+class PinCache:
+    """LRU of pins known to be on each page, keyed by (page, map, quantized X, quantized Y).
+
+    A page's entries are dropped when its main frame navigates or reloads, or when we reattach.
+    """
+    def __init__(self, grid: float = PIN_CACHE_GRID, size: int = PIN_CACHE_SIZE):
+        self.grid = grid
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def key(self, cdp: "CDPClient", plan: DropPlan) -> tuple:
+        page = cdp.target_id or id(cdp)
+        return (page, plan.map_id, round(plan.loc.x / self.grid), round(plan.loc.y / self.grid))
+
+    def seen(self, cdp: "CDPClient", plan: DropPlan) -> bool:
+        if self.grid <= 0:
+            return False
+        k = self.key(cdp, plan)
+        with self.lock:
+            if k in self.entries:
+                self.entries.move_to_end(k)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, cdp: "CDPClient", plan: DropPlan):
+        if self.grid <= 0:
+            return
+        k = self.key(cdp, plan)
+        with self.lock:
+            self.entries[k] = True
+            self.entries.move_to_end(k)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, cdp: "CDPClient"):
+        page = cdp.target_id or id(cdp)
+        with self.lock:
+            stale = [k for k in self.entries if k[0] == page]
+            for k in stale:
+                del self.entries[k]
+            if stale:
+                self.invalidations += 1
+
+    def watch(self, cdp: "CDPClient"):
+        """Forget a page's pins whenever its main frame navigates or reloads.
+
+        A main-frame Page.frameNavigated accompanies every reload and navigation
+        (what Runtime.executionContextsCleared used to tell us, without enabling
+        Runtime). If events overflowed, one of them may have been a navigation,
+        so the page's pins are forgotten then too.
+        """
+        if self.grid <= 0:
+            return  # cache off: nothing to subscribe to
+        def on_navigated(params):
+            if not (params.get("frame") or {}).get("parentId"):
+                self.invalidate(cdp)
+        cdp.on("Page.frameNavigated", on_navigated)
+        cdp.on_overflow(lambda: self.invalidate(cdp))
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return (f"hits={self.hits} misses={self.misses} ({rate:.0f}% saved) "
+                f"invalidations={self.invalidations} size={len(self.entries)}")
+
+PIN_CACHE = PinCache()
+
+
+# =========================
+# Game clients (one window ↔ one map tab)
+# =========================
+class GameClient:
+    """A Pantheon window bound to its own Shalazam tab and CDP connection."""
+    def __init__(self, n: int, window=None, cdp: Optional[CDPClient] = None, target: Optional[dict] = None,
+                 tag: Optional[int] = None):
+        self.n = n
+        self.window = window
+        self.cdp = cdp
+        self.target = target  # None: reattach to whichever Shalazam tab we find
+        self.tag = tag        # trace tag for this client's records (--multi), else None
+        self.lock = threading.Lock()  # one CDP exchange at a time per tab
+        if cdp:
+            cdp.tag = tag
+
+    def reconnect(self, browser: str) -> Optional[CDPClient]:
+        if self.cdp:
+            PIN_CACHE.invalidate(self.cdp)
+        self.close()
+        with span("reconnect", client=self.n):
+            if self.target:
+                try:
+                    self.cdp = attach_target(self.target)
+                except Exception as e:
+                    print(f"[!] Client {self.n}: CDP reattach failed: {e}")
+                    self.cdp = None
+            else:
+                self.cdp = connect_to_shalazam_cdp(allow_relaunch=False, browser=browser)
+        if self.cdp:
+            self.cdp.tag = self.tag
+        return self.cdp
+
+    def already_pinned(self, plan: DropPlan) -> bool:
+        """True if this pin is already on our page (per PIN_CACHE); no CDP round trip."""
+        with self.lock:
+            try:
+                self.cdp.poll_events()  # apply any pending navigation/reload first
+                return self.cdp.map_id == plan.map_id and PIN_CACHE.seen(self.cdp, plan)
+            except Exception:
+                return False
+
+    def drop(self, plan: DropPlan, browser: str, deadline: float = DROP_DEADLINE) -> DropResult:
+        """Place and confirm a pin, retrying until `deadline` s have passed.
+
+        - inputs/button not found: the page is (re)loading; back off and retry on the same socket
+        - reply timeout: the page is busy; retry on the same socket (each attempt gets at most
+          CONFIRM_TIMEOUT + REPLY_MARGIN, so a stalled reply leaves room for another try)
+        - socket lost: reattach (without relaunching the browser), then retry
+        """
+        t0 = time.perf_counter()
+        end = t0 + deadline
+        attempts, reason, backoff = 0, "", RETRY_BACKOFF
+        with self.lock:
+            while True:
+                remaining = end - time.perf_counter()
+                if remaining <= 0:
+                    break
+                attempts += 1
+                try:
+                    if self.cdp is None:
+                        raise ConnectionError("not attached")
+                    ensure_map(self.cdp, plan.map_id, remaining)
+                    remaining = end - time.perf_counter()
+                    if remaining <= 0:
+                        reason = "deadline"  # the map switch took it all; don't click blind
+                        break
+                    val = cdp_drop_pin(self.cdp, plan.x, plan.y,
+                                       min(remaining, CONFIRM_TIMEOUT + REPLY_MARGIN))
+                except websocket.WebSocketTimeoutException:
+                    reason = "eval-timeout"
+                    continue
+                except (websocket.WebSocketException, ConnectionError, OSError):
+                    reason = "socket-lost"
+                    if not self.reconnect(browser):
+                        time.sleep(max(0.0, min(backoff, end - time.perf_counter())))
+                        backoff = min(backoff * 2, 1.0)
+                    continue
+                if val.get("ok"):
+                    if val.get("confirmed"):  # an unseen pin must stay retryable
+                        PIN_CACHE.add(self.cdp, plan)
+                    return DropResult(True, bool(val.get("confirmed")), "", attempts,
+                                      (time.perf_counter() - t0) * 1000.0, val.get("inpage_ms"))
+                reason = val.get("reason") or "unknown"
+                if reason not in NOT_FOUND_REASONS:
+                    break  # the page answered with something retrying won't fix
+                time.sleep(max(0.0, min(backoff, end - time.perf_counter())))
+                backoff = min(backoff * 2, 1.0)
+        return DropResult(False, False, reason or "deadline", attempts, (time.perf_counter() - t0) * 1000.0)
+
+    def close(self):
+        if self.cdp:
+            self.cdp.close()
+
+def open_client(n: int, window) -> Optional[GameClient]:
+    """Give an extra game window its own freshly opened, pre-warmed map tab."""
+    try:
+        t = open_map_tab()
+        cdp = attach_target(t)
     except Exception as e:
-        print(f"[!] JS eval error: {e}")
-        return False
+        print(f"[!] Client {n}: could not open a map tab: {e}")
+        return None
+    cdp.tag = n
+    try:
+        prewarm_pin_path(cdp)
+    except (websocket.WebSocketException, ConnectionError, OSError) as e:
+        print(f"[warn] Client {n}: map tab connection dropped while warming ({e}); will reattach on use.")
+    return GameClient(n, window, cdp, t, tag=n)
+
+def describe_plan(plan: DropPlan) -> str:
+    loc = plan.loc
+    return (f"X={loc.x:g} Z={loc.z:g} Y={loc.y:g} H={loc.heading:g} "
+            f"→ map {plan.map_id} ({plan.x}, {plan.y})")
+
+def capture_loc(window, tag=None) -> Optional[DropPlan]:
+    """Focus `window`, send /loc and parse the clipboard. Prints why when it fails."""
+    with span("focus_pantheon"):
+        focused = focus_pantheon(window)
+    if not focused:
+        print("[!] Pantheon window not found or couldn’t be focused.")
+        return None
+    send_loc_and_copy()
+    raw = get_clipboard_text(tag)
+    if not raw:
+        print("[!] Clipboard empty after /loc.")
+        return None
+    plan = plan_drop(raw)
+    if not plan:
+        print(f"[!] Parse failed: {raw!r}")
+    return plan
 
 
 # =========================
 # Main + hotkeys
 # =========================
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="Drop your Pantheon /loc onto Shalazam maps with a hotkey.")
+    ap.add_argument("--record", metavar="PATH",
+                    help="record CDP traffic, clipboard reads and hotkeys to a trace file (.trace.gz)")
+    ap.add_argument("--replay", metavar="PATH",
+                    help="replay a recorded trace against stand-in transports and report latency")
+    ap.add_argument("--bench-recv", metavar="PATH",
+                    help="micro-benchmark the CDP receive path on the frames of a recorded trace")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="replay speed factor (default 1 = recorded speed, 0 = as fast as possible)")
+    ap.add_argument("--watch", action="store_true",
+                    help="passive mode: drop a pin whenever you copy a /jumploc yourself (no focus or typing)")
+    ap.add_argument("--perf-profile", action="store_true",
+                    help="launch/attach with background throttling and occlusion tracking disabled")
+    ap.add_argument("--app-window", action="store_true",
+                    help="open the map in a chromeless app window (applies when we launch the browser)")
+    ap.add_argument("--timeline", metavar="PATH",
+                    help="write one span per trigger and step as Chrome trace-event JSON (ui.perfetto.dev)")
+    ap.add_argument("--profile", action="store_true",
+                    help=f"start with a cProfile capture of the trigger worker running ({HOTKEY_PROFILE} toggles)")
+    ap.add_argument("--dedup-grid", type=float, default=PIN_CACHE_GRID, metavar="UNITS",
+                    help=f"skip pins within the same UNITS-sized grid cell as one already on the map "
+                         f"(default {PIN_CACHE_GRID:g}; 0 disables)")
+    ap.add_argument("--multi", action="store_true",
+                    help="track every running game client, each with its own map tab and hotkey")
+    return ap.parse_args(argv)
+
 def main():
+    global TRACE, TIMELINE, PERF_PROFILE, APP_WINDOW
+    args = parse_args()
+    PERF_PROFILE = args.perf_profile
+    APP_WINDOW = args.app_window
+    PIN_CACHE.grid = args.dedup_grid
+    if args.replay:
+        report_replay(*replay_trace(args.replay, args.speed))
+        return
+    if args.bench_recv:
+        bench_receive(args.bench_recv)
+        return
+    if args.record:
+        TRACE = TraceRecorder(args.record)
+        print(f"[info] Recording trace to {args.record}")
+    if args.timeline:
+        TIMELINE = Timeline(args.timeline)
+        print(f"[info] Writing timeline to {args.timeline}")
+    try:
+        run_session(args)
+    finally:
+        # Also on early returns, errors and Ctrl+C: failed sessions are the traces worth keeping
+        if TRACE is not None:
+            TRACE.close()
+        if TIMELINE is not None:
+            TIMELINE.close()
+
+def run_session(args):
+    """Startup pipeline, hotkeys and the event loop, until Ctrl+Q."""
+    profiler = TriggerProfiler()
+    if args.profile:
+        profiler.toggle()
+
+    if args.multi and args.watch:
+        print("[warn] --multi has no effect with --watch; watching a single clipboard.")
+        args.multi = False
+
+    # Startup pipeline. While the browser prompt is on screen, two workers run:
+    # game-window discovery, and (if a DevTools browser is already up) attaching to
+    # its map tab and pre-warming the pin path. Otherwise the browser is launched
+    # after the prompt and the page loads while we wait for DevTools; the pin path
+    # is warmed alongside window discovery / extra client tabs before "Ready!".
+    t_start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="startup")
+    fut_attach = pool.submit(attach_existing)
+    fut_windows = None
+    if not args.watch:
+        fut_windows = pool.submit(find_pantheon_windows if args.multi else
+                                  lambda: [w for w in [find_pantheon_window()] if w])
+
     # Choose browser
+    t_prompt = time.perf_counter()
     choice = input("Use (E)dge or (C)hrome? [E/C]: ").strip().lower()
+    prompt_s = time.perf_counter() - t_prompt
     browser = "edge" if choice in ("", "e", "edge") else "chrome"
     print(f"[info] Using {browser.title()}")
 
-    # Ensure DevTools is up (launch if needed)
-    if not ensure_browser_ready(browser):
-        return
+    cdp, warmed = fut_attach.result()
+    fut_warm = None
+    if cdp:
+        print(f"[OK] Attached to Shalazam via CDP (existing DevTools socket on {DEBUG_PORT}).")
+    else:
+        # Ensure DevTools is up (launch if needed)
+        if not ensure_browser_ready(browser):
+            pool.shutdown(wait=False)
+            return
 
-    # Attach to Shalazam tab
-    cdp = connect_to_shalazam_cdp(allow_relaunch=True, browser=browser)
-    if not cdp:
-        print("[!] Could not attach to a Shalazam tab.")
-        return
-    print("[OK] Attached to Shalazam via CDP.")
-    print(f"Hotkeys:\n  {HOTKEY_TRIGGER} → grab /loc and drop pin\n  {HOTKEY_QUIT}   → quit")
+        # Attach to Shalazam tab
+        cdp = connect_to_shalazam_cdp(allow_relaunch=True, browser=browser)
+        if not cdp:
+            print("[!] Could not attach to a Shalazam tab.")
+            pool.shutdown(wait=False)
+            return
+        print("[OK] Attached to Shalazam via CDP.")
+        fut_warm = pool.submit(prewarm_pin_path, cdp)
+    windows = fut_windows.result() if fut_windows else []
+    if fut_windows and not windows:
+        print("[warn] Pantheon window not found yet; will look again on the first hotkey.")
+    clients = [GameClient(1, windows[0] if windows else None, cdp, tag=1 if args.multi else None)]
+    if args.multi:
+        extra = [pool.submit(open_client, n, w) for n, w in enumerate(windows[1:], start=2)]
+        clients += [c for c in (f.result() for f in extra) if c]
+        print(f"[info] Multi-client: {len(clients)} game window(s), one map tab each.")
+    if fut_warm:
+        try:
+            warmed = fut_warm.result()
+        except (websocket.WebSocketException, ConnectionError, OSError) as e:
+            print(f"[warn] CDP connection dropped while warming ({e}); will reattach on the first pin.")
+    if not warmed:
+        print("[warn] Map inputs not found yet; pins will retry when you trigger.")
+    pool.shutdown(wait=False)
+    primary = clients[0]
+
+    if args.watch:
+        print(f"Hotkeys:\n  {HOTKEY_QUIT}   → quit")
+    else:
+        print(f"Hotkeys:\n  {HOTKEY_TRIGGER} → grab /loc and drop pin\n  {HOTKEY_QUIT}   → quit")
+    if args.multi:
+        for c in clients[:9]:
+            print(f"  {HOTKEY_CLIENT_FMT.format(n=c.n)} → client {c.n} only")
+        print(f"  {HOTKEY_ALL_CLIENTS} → all clients")
 
     last_fire = 0.0
+    first_trigger = True
+    capture_lock = threading.Lock()  # focus + clipboard can only serve one client at a time
+    drop_pool = ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix="drop")
+
+    def drop(plan: DropPlan, client: GameClient) -> bool:
+        who = f"[client {client.n}] " if args.multi else ""
+        print(f"[INFO] {who}Parsed {describe_plan(plan)}. Dropping pin…")
+        if client.already_pinned(plan):
+            trace("hit", [plan.x, plan.y], client.tag)
+            print(f"[OK] {who}Already on the map; skipped. [cache {PIN_CACHE.stats()}]")
+            return True
+        res = client.drop(plan, browser)
+        tries = f", {res.attempts} attempts" if res.attempts > 1 else ""
+        if res.confirmed:
+            CONFIRM_LATENCY.append(res.total_ms)
+            trace("mark", {"name": "confirmed_pin_ms", "ms": res.total_ms})
+            print(f"[OK] {who}Pin confirmed on the map in {res.total_ms:.0f} ms{tries}.")
+        elif res.ok:
+            print(f"[OK] {who}Pin dropped in {res.total_ms:.0f} ms{tries}, "
+                  f"but no new marker appeared within {CONFIRM_TIMEOUT:g} s.")
+        else:
+            print(f"[!] {who}Failed to drop pin ({res.reason}) after {res.total_ms:.0f} ms{tries}.")
+        return res.ok
+
+    def on_clipboard(text: str):
+        plan = plan_drop(text)
+        if not plan:
+            return  # not a /jumploc; ignore (and don't record) whatever else gets copied
+        # Same order as a hotkey trigger so replay puts the text in this trigger's segment
+        trace("key", "clipboard", primary.tag)
+        trace("clip", text, primary.tag)
+        print("\n[*] New /jumploc on clipboard.")
+        with span("trigger", source="clipboard"):
+            drop(plan, primary)  # repeats of the same spot are skipped by PIN_CACHE
 
     def on_trigger():
-        nonlocal last_fire, cdp
+        nonlocal last_fire
         if time.time() - last_fire < HOTKEY_DEBOUNCE:
             return
         last_fire = time.time()
+        with span("trigger", source=HOTKEY_TRIGGER):
+            capture_and_drop()
+
+    def capture_and_drop():
+        nonlocal first_trigger
+        t0 = time.perf_counter()
+        trace("key", HOTKEY_TRIGGER, primary.tag)
 
         print("\n[*] Capturing /loc…")
-        if not focus_pantheon():
-            print("[!] Pantheon window not found or couldn’t be focused.")
-            return
-        send_loc_and_copy()
-        raw = get_clipboard_text()
-        if not raw:
-            print("[!] Clipboard empty after /loc.")
-            return
-        x, y = parse_jumploc(raw)
-        if not (x and y):
-            print(f"[!] Parse failed: {raw!r}")
+        if not args.multi and not window_alive(primary.window):
+            primary.window = find_pantheon_window()
+        with capture_lock:
+            plan = capture_loc(primary.window, primary.tag)
+        if not plan:
             return
-        print(f"[INFO] Parsed X={x} Y={y}. Dropping pin…")
+        ok = drop(plan, primary)
+        if first_trigger and ok:
+            first_trigger = False
+            ms = (time.perf_counter() - t0) * 1000.0
+            trace("mark", {"name": "first_trigger_ms", "ms": ms})
+            print(f"[perf] First trigger: {ms:.0f} ms")
 
-        try:
-            ok = cdp_drop_pin(cdp, x, y)
-        except Exception:
-            try:
-                cdp.close()
-            except Exception:
-                pass
-            # Reattach once without relaunch
-            cdp = connect_to_shalazam_cdp(allow_relaunch=False, browser=browser)
-            ok = cdp_drop_pin(cdp, x, y) if cdp else False
+    def capture_clients(targets: list):
+        """Capture each client in turn; each drop starts as soon as its capture is done."""
+        t0 = time.perf_counter()
+        futures = []
+        with capture_lock:
+            for c in targets:
+                print(f"\n[*] Capturing /loc for client {c.n}…")
+                if not window_alive(c.window):
+                    print(f"[!] Client {c.n}: game window is gone.")
+                    continue
+                trace("key", HOTKEY_CLIENT_FMT.format(n=c.n), c.tag)
+                plan = capture_loc(c.window, c.tag)
+                if plan:
+                    futures.append(drop_pool.submit(drop, plan, c))
+        capture_ms = (time.perf_counter() - t0) * 1000.0
+        ok = sum(1 for f in futures if f.result())
+        total_ms = (time.perf_counter() - t0) * 1000.0
+        if len(targets) > 1:
+            trace("mark", {"name": "sweep_ms", "ms": total_ms})
+            print(f"[perf] Sweep: {ok}/{len(targets)} pins in {total_ms:.0f} ms "
+                  f"(capture {capture_ms:.0f} ms)")
 
-        print("[OK] Pin dropped." if ok else "[!] Failed to drop pin.")
+    def on_clients(targets: list, source: str):
+        nonlocal last_fire
+        if time.time() - last_fire < HOTKEY_DEBOUNCE:
+            return
+        last_fire = time.time()
+        with span("trigger", source=source):
+            capture_clients(targets)
 
-    keyboard.add_hotkey(HOTKEY_TRIGGER, on_trigger)
-    print("\nReady! (Run as Administrator for reliable global hotkeys.)")
+    watcher = None
+    if args.watch:
+        watcher = ClipboardWatcher(lambda text: profiler.run(on_clipboard, text))
+        watcher.start()
+        print("\nReady! Watching the clipboard — type /loc in game and pins drop automatically.")
+    else:
+        keyboard.add_hotkey(HOTKEY_TRIGGER, lambda: profiler.run(on_trigger))
+        if args.multi:
+            for c in clients[:9]:
+                hk = HOTKEY_CLIENT_FMT.format(n=c.n)
+                keyboard.add_hotkey(hk, lambda c=c, hk=hk: profiler.run(on_clients, [c], hk))
+            keyboard.add_hotkey(HOTKEY_ALL_CLIENTS,
+                                lambda: profiler.run(on_clients, clients, HOTKEY_ALL_CLIENTS))
+        print("\nReady! (Run as Administrator for reliable global hotkeys.)")
+    ready_ms = (time.perf_counter() - t_start - prompt_s) * 1000.0
+    trace("mark", {"name": "time_to_ready_ms", "ms": ready_ms})
+    print(f"[perf] Time to ready: {ready_ms:.0f} ms (excluding {prompt_s:.1f} s at the browser prompt)")
     print(f"Press {HOTKEY_QUIT} to exit.")
+    keyboard.add_hotkey(HOTKEY_PROFILE, profiler.toggle)
     keyboard.wait(HOTKEY_QUIT)
 
-    try:
-        cdp.close()
-    except Exception:
-        pass
+    if watcher:
+        watcher.stop()
+    drop_pool.shutdown(wait=True)
+    if INPAGE_LATENCY:
+        lat = list(INPAGE_LATENCY)
+        print(f"[perf] In-page latency ({launch_profile_name()} profile): n={len(lat)} "
+              f"p50={percentile(lat, 50):.1f}ms p95={percentile(lat, 95):.1f}ms")
+
+    if CONFIRM_LATENCY:
+        lat = list(CONFIRM_LATENCY)
+        print(f"[perf] Time to confirmed pin: n={len(lat)} "
+              f"p50={percentile(lat, 50):.0f}ms p95={percentile(lat, 95):.0f}ms")
+    if PIN_CACHE.hits or PIN_CACHE.misses:
+        print(f"[perf] Dedup cache: {PIN_CACHE.stats()}")
+    for c in clients:
+        if c.cdp and c.cdp.events_dropped:
+            print(f"[perf] Client {c.n}: {c.cdp.events_dropped} CDP event(s) dropped "
+                  f"(buffer {EVENT_BUFFER_MAX}); its cached pins were invalidated.")
+
+    for c in clients:
+        c.close()
+    if profiler.prof is not None:
+        profiler.toggle()
     print("\nExiting… bye!")
 
 